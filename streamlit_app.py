@@ -15,62 +15,322 @@
 import streamlit as st
 import requests
 import re
-from typing import List, Tuple
+import threading
+import time
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional, Tuple, cast
+
+# Precompiled patterns, built once instead of on every call
+CITE_KEY_RE = re.compile(r"@article\{([^,]+),")
+FIELD_RE = re.compile(r"(\w+)\s*=\s*\{([^}]*)\}")
+# Whole DOI tokens: a "10." prefix, a suffix starting with a valid DOI character,
+# then everything up to the next comma or whitespace
+DOI_TOKEN_RE = re.compile(r"10\.\d{4,9}/[-._;()/:A-Za-z0-9][^\s,]*")
+YEAR_RE = re.compile(r"year\s*=\s*{(\d{4})}")
+
+# Upper bound on simultaneous DOI lookups during a batch conversion
+MAX_WORKERS = 8
+
+# (connect, read) timeout in seconds for a single doi.org request
+REQUEST_TIMEOUT = (5, 30)
+
+# How long fetched BibTeX stays cached (seconds), and how many DOIs are kept
+CACHE_TTL = 24 * 60 * 60
+CACHE_MAX_ENTRIES = 1024
+
+# Messages doi2bib returns in place of an entry when a lookup fails
+NOT_FOUND_MESSAGE = "DOI not found."
+UNAVAILABLE_MESSAGE = "Service unavailable."
+LOOKUP_ERROR_MESSAGES = frozenset((NOT_FOUND_MESSAGE, UNAVAILABLE_MESSAGE))
+
+# Fields placed immediately after the citekey, in this order
+ORDERED_KEYS = ("title", "author")
+
+
+class DOILookupError(Exception):
+    """Raised when doi.org does not return BibTeX for a DOI."""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+class BibtexCache:
+    """
+    A size-bounded, thread-safe cache of raw BibTeX keyed by DOI, with a time-to-live.
+
+    Lookups and stores happen on the script thread; worker threads only do network I/O.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, doi: str) -> Optional[str]:
+        """Return the cached BibTeX for a DOI, or None if it is missing or expired."""
+        with self._lock:
+            cached = self._entries.get(doi)
+            if cached is None:
+                return None
+            stored_at, bibtex = cached
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[doi]
+                return None
+            return bibtex
+
+    def set(self, doi: str, bibtex: str) -> None:
+        """Store the BibTeX for a DOI, evicting the oldest entries beyond ``max_entries``."""
+        with self._lock:
+            self._entries[doi] = (time.monotonic(), bibtex)
+            self._entries.move_to_end(doi)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
 
 ## Required Functions
-def doi2bib(doi: str) -> Tuple[str, str]:
+@st.cache_resource
+def get_session() -> requests.Session:
     """
-    Converts a DOI (Digital Object Identifier) to a BibTeX entry and formats it.
+    Creates the HTTP session shared by all DOI lookups.
+
+    The session keeps connections to doi.org alive between requests and across
+    Streamlit reruns, and retries transient server errors with backoff.
+
+    Returns:
+        requests.Session: A session with a connection pool sized for ``MAX_WORKERS``.
+    """
+    retries = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS, max_retries=retries
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(
+        {"User-Agent": "DOI2BibTex (https://github.com/Ajaykhanna/DOI2BibTex)"}
+    )
+    return session
+
+
+@st.cache_resource
+def get_bibtex_cache() -> BibtexCache:
+    """
+    Creates the BibTeX cache shared by all sessions and Streamlit reruns.
+
+    Returns:
+        BibtexCache: A cache holding successful doi.org responses for ``CACHE_TTL`` seconds.
+    """
+    return BibtexCache(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+
+
+def fetch_bibtex(doi: str, session: requests.Session) -> str:
+    """
+    Fetches the raw BibTeX for a DOI from doi.org.
+
+    This only does network I/O and touches no Streamlit state, so it is safe to
+    call from worker threads.
 
     Args:
-        doi (str): The DOI to be converted to a BibTeX entry.
+        doi (str): The DOI to look up.
+        session (requests.Session): The session to send the request with.
 
     Returns:
-        Tuple[str, str]: A tuple containing the citation key and the formatted BibTeX entry,
-        or an error message if the DOI is not found or the service is unavailable.
+        str: The BibTeX returned by doi.org.
+
+    Raises:
+        DOILookupError: If the DOI is not found or the service is unavailable,
+            including connection errors and timeouts.
     """
-    BASE_URL = "http://dx.doi.org/"
+    BASE_URL = "https://doi.org/"
     url = BASE_URL + doi
     headers = {"Accept": "application/x-bibtex"}
-    response = requests.get(url, headers=headers)
+    try:
+        response = session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        raise DOILookupError(UNAVAILABLE_MESSAGE) from e
     if response.status_code == 404:
-        return "unknown", "DOI not found."
+        raise DOILookupError(NOT_FOUND_MESSAGE)
     elif response.status_code != 200:
-        return "unknown", "Service unavailable."
+        raise DOILookupError(UNAVAILABLE_MESSAGE)
+
+    return response.content.decode()
+
+
+def doi2bib(doi: str, session: Optional[requests.Session] = None) -> Tuple[str, str]:
+    """
+    Converts a DOI (Digital Object Identifier) to a BibTeX entry and formats it.
+
+    Args:
+        doi (str): The DOI to be converted to a BibTeX entry.
+        session (Optional[requests.Session]): The session to send the request with.
+            Defaults to the shared session from ``get_session``.
+
+    Returns:
+        Tuple[str, str]: A tuple containing the citation key and the formatted BibTeX entry,
+        or an error message if the DOI is not found or the service is unavailable.
+    """
+    cache = get_bibtex_cache()
+    bibtex = cache.get(doi)
+    if bibtex is None:
+        try:
+            bibtex = fetch_bibtex(doi, session or get_session())
+        except DOILookupError as e:
+            return "unknown", e.message
+        cache.set(doi, bibtex)
+
+    return format_bibtex(bibtex)
+
+
+def format_bibtex(bibtex: str) -> Tuple[str, str]:
+    """
+    Reformats a BibTeX entry with each field on its own line, title and author first.
 
-    bibtex = response.content.decode()
+    Args:
+        bibtex (str): The BibTeX entry as returned by doi.org.
 
+    Returns:
+        Tuple[str, str]: A tuple containing the citation key and the formatted BibTeX entry.
+    """
     # Extract the citation key
-    cite_key_match = re.search(r"@article\{([^,]+),", bibtex)
+    cite_key_match = CITE_KEY_RE.search(bibtex)
     cite_key = cite_key_match.group(1) if cite_key_match else "unknown"
 
     # Reformat BibTeX output to place each field on a new line, with title and author first
-    fields = re.findall(r"(\w+)\s*=\s*\{([^}]*)\}", bibtex)
+    fields = FIELD_RE.findall(bibtex)
     fields_dict = dict(fields)
 
     # Ordering fields with title and author immediately after the citekey
-    ordered_keys = ["title", "author"]
-    ordered_fields = [(k, fields_dict[k]) for k in ordered_keys if k in fields_dict]
+    ordered_fields = [(k, fields_dict[k]) for k in ORDERED_KEYS if k in fields_dict]
 
     # Include other fields in the original order excluding title and author
-    other_fields = [(k, v) for k, v in fields if k not in ordered_keys]
+    other_fields = [(k, v) for k, v in fields if k not in ORDERED_KEYS]
 
-    formatted_bibtex = f"@article{{{cite_key},\n"
-    for key, value in ordered_fields + other_fields:
-        formatted_bibtex += f"\t{key} = {{{value}}},\n"
-    formatted_bibtex = formatted_bibtex.rstrip(",\n") + "\n}"
+    # Assemble the entry with a single join rather than repeated concatenation
+    lines = [f"@article{{{cite_key}"]
+    lines.extend(f"\t{key} = {{{value}}}" for key, value in ordered_fields)
+    lines.extend(f"\t{key} = {{{value}}}" for key, value in other_fields)
+    formatted_bibtex = ",\n".join(lines) + "\n}"
 
     return cite_key, formatted_bibtex
 
 
-def is_valid_doi(doi: str) -> bool:
-    """Validate DOI format."""
-    return bool(re.match(r"10.\d{4,9}/[-._;()/:A-Z0-9]+", doi, re.IGNORECASE))
+def fetch_bibtex_entries(
+    dois: List[str], progress_callback: Optional[Callable[[int, int, str], None]] = None
+) -> List[Tuple[str, str]]:
+    """
+    Converts several DOIs to BibTeX entries concurrently.
+
+    Args:
+        dois (List[str]): The DOIs to be converted.
+        progress_callback (Optional[Callable[[int, int, str], None]]): Called as
+            ``(completed, total, doi)`` each time a lookup finishes.
+
+    Returns:
+        List[Tuple[str, str]]: The ``doi2bib`` result for each DOI, in the same order as ``dois``.
+    """
+    if not dois:
+        return []
+    total = len(dois)
+    report_progress = progress_callback or (lambda *_: None)
+    results: List[Optional[Tuple[str, str]]] = [None] * total
+    # Cache and session are read on the script thread; workers only fetch cache misses
+    cache = get_bibtex_cache()
+    session = get_session()
+    completed = 0
+    misses = []
+    for index, doi in enumerate(dois):
+        bibtex = cache.get(doi)
+        if bibtex is None:
+            misses.append(index)
+        else:
+            results[index] = format_bibtex(bibtex)
+            completed += 1
+            report_progress(completed, total, doi)
+    if not misses:
+        return cast(List[Tuple[str, str]], results)
+
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(misses))) as executor:
+        futures = {
+            executor.submit(fetch_bibtex, dois[index], session): index
+            for index in misses
+        }
+        # Results arrive in completion order; write each back to its input slot
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                bibtex = future.result()
+            except DOILookupError as e:
+                results[index] = ("unknown", e.message)
+            else:
+                cache.set(dois[index], bibtex)
+                results[index] = format_bibtex(bibtex)
+            completed += 1
+            report_progress(completed, total, dois[index])
+    # Every slot has been filled by a cache hit, a fetched entry or an error tuple
+    return cast(List[Tuple[str, str]], results)
+
+
+def strip_doi_punctuation(doi: str) -> str:
+    """
+    Removes punctuation that surrounds a DOI in prose from the end of a token.
+
+    Args:
+        doi (str): A DOI token as extracted from the input.
+
+    Returns:
+        str: The token without trailing periods or unbalanced closing ``)``/``]``.
+    """
+    while True:
+        if doi.endswith("."):
+            doi = doi[:-1]
+        elif doi.endswith(")") and doi.count(")") > doi.count("("):
+            doi = doi[:-1]
+        elif doi.endswith("]") and doi.count("]") > doi.count("["):
+            doi = doi[:-1]
+        else:
+            return doi
+
+
+def parse_dois(text: str) -> List[str]:
+    """
+    Extracts the DOIs from user input in a single regex pass.
+
+    Each DOI is taken whole, up to the next comma or whitespace, so DOIs with
+    characters such as ``<``, ``>`` or ``+`` (e.g. SICI-style Wiley DOIs) are kept intact.
+    A trailing period and unbalanced closing ``)`` or ``]`` are stripped, so DOIs
+    written as ``(10.1000/abc)`` or ending a sentence resolve correctly.
+
+    Args:
+        text (str): Raw input, usually DOIs separated by commas.
+
+    Returns:
+        List[str]: The unique DOIs found, in order of first appearance. DOIs are
+        case-insensitive, so spellings differing only in case count as one.
+    """
+    unique_dois = {}
+    for token in DOI_TOKEN_RE.findall(text):
+        doi = strip_doi_punctuation(token)
+        # Skip tokens that were nothing but punctuation after the prefix
+        if doi.endswith("/"):
+            continue
+        unique_dois.setdefault(doi.lower(), doi)
+    return list(unique_dois.values())
 
 
 def extract_year(bibtex: str) -> int:
     """Extract the year from a BibTeX entry."""
-    match = re.search(r"year\s*=\s*{(\d{4})}", bibtex)
+    match = YEAR_RE.search(bibtex)
     return int(match.group(1)) if match else 0  # Return 0 if no year is found
 
 
@@ -129,45 +389,56 @@ st.markdown(
 
 st.title("DOI to BibTeX Converter")
 doi_input = st.text_input("Enter DOIs (separated by commas)", value="10.1000/xyz123")
-doi_list = [doi.strip() for doi in doi_input.split(",") if is_valid_doi(doi.strip())]
+doi_list = parse_dois(doi_input)
 
 if "bibtex_entries" not in st.session_state:
     st.session_state.bibtex_entries = []
 
 if st.button("Convert DOIs to BibTeX"):
-    st.session_state.bibtex_entries = []
-    for doi in doi_list:
-        cite_key, bibtex = doi2bib(doi)
-        if "DOI not found" not in bibtex and "Service unavailable" not in bibtex:
-            st.session_state.bibtex_entries.append(
-                (cite_key, bibtex, extract_year(bibtex))
-            )
+    entries = []
+    progress_bar = st.progress(0.0)
+    results = fetch_bibtex_entries(
+        doi_list,
+        lambda done, total, doi: progress_bar.progress(
+            done / total, text=f"Fetched {doi} ({done}/{total})"
+        ),
+    )
+    progress_bar.empty()
+    for doi, (cite_key, bibtex) in zip(doi_list, results):
+        if bibtex not in LOOKUP_ERROR_MESSAGES:
+            entries.append((cite_key, bibtex, extract_year(bibtex)))
         else:
             st.write(f"Error for DOI {doi}: {bibtex}")
+    st.session_state.bibtex_entries = entries
+
+# Look the entries up in session state once and reuse the local below
+bibtex_entries = st.session_state.bibtex_entries
+if bibtex_entries:
+    # Split cite keys and BibTeX out of the stored entries in one pass
+    cite_keys, bibtexs, _ = zip(*bibtex_entries)
 
-if st.session_state.bibtex_entries:
     # Display cite keys
     st.subheader("Cite Keys")
-    cite_keys_list = ",".join([entry[0] for entry in st.session_state.bibtex_entries])
+    cite_keys_list = ",".join(cite_keys)
     st.code(cite_keys_list, language="plaintext")
 
     # Display BibTeX entries in original order
-    bibtex_result = "\n\n".join([entry[1] for entry in st.session_state.bibtex_entries])
+    bibtex_result = "\n\n".join(bibtexs)
     st.subheader("BibTeX Entries")
     st.code(bibtex_result, language="plaintext")
 
     # Add a button to sort by year
     if st.button("Sort by Year"):
-        sorted_entries = sorted(
-            st.session_state.bibtex_entries, key=lambda x: x[2], reverse=False
-        )
+        sorted_entries = sorted(bibtex_entries, key=lambda x: x[2], reverse=False)
+
+        sorted_cite_keys, sorted_bibtexs, _ = zip(*sorted_entries)
 
         # Display sorted cite keys
         st.subheader("Cite Keys (Sorted by Year)")
-        sorted_cite_keys_list = ",".join([entry[0] for entry in sorted_entries])
+        sorted_cite_keys_list = ",".join(sorted_cite_keys)
         st.code(sorted_cite_keys_list, language="plaintext")
 
-        sorted_bibtex_result = "\n\n".join([entry[1] for entry in sorted_entries])
+        sorted_bibtex_result = "\n\n".join(sorted_bibtexs)
         st.subheader("BibTeX Entries (Sorted by Year)")
         st.code(sorted_bibtex_result, language="plaintext")
 